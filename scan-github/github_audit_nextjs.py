@@ -2,64 +2,49 @@
 import os
 import sys
 import re
-import time
 import json
-import requests
-from dotenv import load_dotenv
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, quote, urlparse
+from github_common import (GITHUB_RAW, SESSION, RateLimiter, MAX_ORGS_PER_QUERY, check_rate_limit,
+                           load_orgs, search_org_batch, split_search_queries)
 import base64
+from collections import Counter
 
-# Load environment variables
-load_dotenv()
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-GITHUB_API = os.getenv("GITHUB_ENTERPRISE", "https://api.github.com")
-
-ORG_FILE = "github_orgs.json"
 RESULTS_FILE = "nextjs_versions.json"
+# package.json blobs are content-addressed, so a blob SHA always maps to the same version
+PKG_CACHE_FILE = ".pkg_cache.json"
 # Use text-match header to get code fragments in results
-HEADERS = {
-    "Authorization": f"Bearer {GITHUB_TOKEN}",
-    "Accept": "application/vnd.github.v3.text-match+json"
-}
-
-def check_rate_limit():
-    """Check GitHub API rate limits."""
-    url = f"{GITHUB_API}/rate_limit"
-    response = requests.get(url, headers=HEADERS)
-    if response.status_code == 200:
-        data = response.json()
-        remaining = data["rate"]["remaining"]
-        reset_time = int(data["rate"]["reset"])
-        print(f"⏱  API Rate Limit: {remaining} requests remaining. Resets at {reset_time}.")
-        return remaining, reset_time
-    else:
-        print(f"⚠️  Error checking rate limit: {response.status_code} - {response.text}")
-        return 0, 0
-
-def fetch_github_orgs():
-    """Fetch all organizations associated with the authenticated user."""
-    url = f"{GITHUB_API}/user/orgs"
-    response = requests.get(url, headers=HEADERS)
-    if response.status_code == 200:
-        orgs = [org["login"] for org in response.json()]
-        with open(ORG_FILE, "w") as f:
-            json.dump(orgs, f, indent=4)
-        print(f"✅ Organizations saved to {ORG_FILE}")
-        return orgs
-    else:
-        print(f"❌ Error fetching orgs: {response.status_code} - {response.text}")
-        return []
-
-def load_orgs():
-    """Load GitHub organizations from file or fetch them if missing."""
-    if not os.path.exists(ORG_FILE):
-        print("⚠️  Org file missing. Fetching from GitHub...")
-        return fetch_github_orgs()
+SEARCH_HEADERS = {"Accept": "application/vnd.github.v3.text-match+json"}
+SEARCH_DESCRIPTION = "next.js declarations in package.json"
+
+# Number of org batches searched / package.json files fetched concurrently
+MAX_WORKERS = 8
+
+# Pulls dependencies.next out of a search text-match fragment; the [^{}] run keeps the
+# match inside the "dependencies" block so devDependencies/peerDependencies are ignored
+NEXT_DEP_PATTERN = re.compile(r'"dependencies"\s*:\s*\{[^{}]*?"next"\s*:\s*"([^"]+)"')
+
+# Blob SHA -> dependencies.next (None when absent), shared across search hits and runs
+_pkg_cache = {}
+
+# The contents API is metered separately from code search (see github_common.search_limiter)
+core_limiter = RateLimiter()
+
+def load_pkg_cache():
+    """Load the package.json version cache saved by a previous run."""
+    if not os.path.exists(PKG_CACHE_FILE):
+        return
     try:
-        with open(ORG_FILE, "r") as f:
-            return json.load(f)
+        with open(PKG_CACHE_FILE, "r") as f:
+            _pkg_cache.update(json.load(f))
     except Exception as e:
-        print(f"❌ Error loading {ORG_FILE}: {e}")
-        return fetch_github_orgs()
+        print(f"⚠️  Ignoring unreadable {PKG_CACHE_FILE}: {e}")
+
+def save_pkg_cache():
+    """Persist the package.json version cache for the next run."""
+    with open(PKG_CACHE_FILE, "w") as f:
+        json.dump(_pkg_cache, f)
 
 def search_all_orgs(search_query):
     """Search all orgs for the specified query and extract next.js version info."""
@@ -67,49 +52,18 @@ def search_all_orgs(search_query):
     if not orgs:
         print("❌ No organizations found. Exiting.")
         sys.exit(1)
+    check_rate_limit()
+    load_pkg_cache()
 
-    all_results = []
-    requests_made = 0
-
-    for org in orgs:
-        # Rate-limit safeguard: back off after ~9 requests
-        if requests_made >= 9:
-            print("⏳ Reached 9 requests, backing off for 65 seconds...")
-            time.sleep(65)
-            requests_made = 0
-
-        url = f"{GITHUB_API}/search/code"
-        params = {"q": f"org:{org} {search_query}", "per_page": 100}
-        print(f"🔍 Searching for next.js declarations in package.json in org '{org}'...")
-        retries = 0
-        max_retries = 5
-
-        while retries < max_retries:
-            remaining, reset_time = check_rate_limit()
-            if remaining == 0:
-                sleep_time = max(reset_time - int(time.time()), 65)
-                print(f"⏳ Rate limit exceeded. Sleeping for {sleep_time} seconds...")
-                time.sleep(sleep_time)
-                retries += 1
-
-            response = requests.get(url, headers=HEADERS, params=params)
-            requests_made += 1
-
-            if response.status_code == 200:
-                items = response.json().get("items", [])
-                for item in items:
-                    entry = extract_nextjs_version(item)
-                    if entry:
-                        all_results.append(entry)
-                break  # exit retry loop on success
-            elif response.status_code == 403:
-                retries += 1
-                sleep_time = 65 * (2 ** retries)
-                print(f"⚠️  Rate limit hit. Retrying in {sleep_time} seconds...")
-                time.sleep(sleep_time)
-            else:
-                print(f"❌ API Error: {response.status_code} - {response.text}")
-                break
+    # Searches and file fetches are network-bound, so overlap them across a thread pool
+    # Several orgs fit in one query; extract_nextjs_version reads each hit's owner from the result
+    org_queries = split_search_queries(orgs, search_query, max_orgs=MAX_ORGS_PER_QUERY)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        items = [item for batch_items in executor.map(lambda query: search_org_batch(query, search_query, SEARCH_HEADERS, SEARCH_DESCRIPTION), org_queries)
+                 for item in batch_items]
+        all_results = [entry for entry in executor.map(extract_nextjs_version, items) if entry]
+
+    save_pkg_cache()
 
     with open(RESULTS_FILE, "w") as f:
         json.dump(all_results, f, indent=4)
@@ -123,20 +77,59 @@ def extract_nextjs_version(item):
     html_url = item["html_url"]
     version = None
 
+    sha = item.get("sha")
+    if sha in _pkg_cache:
+        # Same blob already seen (fork, mirror, earlier run) - skip the fetch and parse
+        return build_entry(org, repo, file_path, _pkg_cache[sha], html_url)
+
+    # The search hit usually already carries the dependency in its text-match fragment
+    for text_match in item.get("text_matches", []):
+        match = NEXT_DEP_PATTERN.search(text_match.get("fragment", ""))
+        if match:
+            version = match.group(1)
+            if sha:
+                _pkg_cache[sha] = version
+            return build_entry(org, repo, file_path, version, html_url)
+
+    try:
+        pkg = fetch_package_json(item)
+        if pkg is not None:
+            deps = pkg.get("dependencies", {})
+            version = deps.get("next")
+            if sha:
+                _pkg_cache[sha] = version
+    except Exception as e:
+        print(f"⚠️ Error parsing {repo}/{file_path}: {e}")
+
+    return build_entry(org, repo, file_path, version, html_url)
+
+def fetch_package_json(item):
+    """Fetch and parse a search hit's package.json, or None if it can't be retrieved."""
     file_api_url = item.get("url")
-    if file_api_url:
-        r = requests.get(file_api_url, headers={"Authorization": f"Bearer {GITHUB_TOKEN}"})
+    if not file_api_url:
+        return None
+
+    # The raw host returns the file bytes directly; the commit comes from the contents URL's ?ref=
+    # GITHUB_RAW is only set when it belongs to the configured API host (see github_common)
+    ref = parse_qs(urlparse(file_api_url).query).get("ref", [None])[0]
+    if ref and GITHUB_RAW:
+        raw_url = f"{GITHUB_RAW}/{item['repository']['full_name']}/{ref}/{quote(item['path'])}"
+        r = SESSION.get(raw_url)
         if r.status_code == 200:
-            try:
-                content_json = r.json()
-                if "content" in content_json and content_json.get("encoding") == "base64":
-                    decoded = base64.b64decode(content_json["content"]).decode("utf-8")
-                    pkg = json.loads(decoded)
-                    deps = pkg.get("dependencies", {})
-                    version = deps.get("next")
-            except Exception as e:
-                print(f"⚠️ Error parsing {repo}/{file_path}: {e}")
+            return orjson.loads(r.content)
+
+    # Fall back to (or, without a raw host, go straight to) the contents API
+    core_limiter.maybe_sleep()
+    r = SESSION.get(file_api_url)
+    core_limiter.update(r)
+    if r.status_code == 200:
+        content_json = orjson.loads(r.content)
+        if "content" in content_json and content_json.get("encoding") == "base64":
+            return orjson.loads(base64.b64decode(content_json["content"]))
+    return None
 
+def build_entry(org, repo, file_path, version, html_url):
+    """Build a results entry, or None when no next.js version was found."""
     if version:
         return {
             "org": org,
@@ -154,10 +147,7 @@ def print_summary(results):
         print("No next.js usage found.")
         return
 
-    version_counts = {}
-    for entry in results:
-        ver = entry["version"]
-        version_counts[ver] = version_counts.get(ver, 0) + 1
+    version_counts = Counter(entry["version"] for entry in results)
 
     for ver, count in version_counts.items():
         print(f"Version {ver}: {count} occurrence(s)")
@@ -0,0 +1,217 @@
+# Helpers shared by the GitHub search scripts
+
+import os
+import json
+import time
+import threading
+from functools import lru_cache
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+PUBLIC_GITHUB_API = "https://api.github.com"
+GITHUB_API = os.getenv("GITHUB_ENTERPRISE", PUBLIC_GITHUB_API)
+# Raw file host; serves file bytes directly without the contents API's base64 envelope.
+# Only github.com has a known default; on GitHub Enterprise it stays None (use the
+# contents API) unless GITHUB_RAW is set, so the token is never sent to another host.
+GITHUB_RAW = os.getenv("GITHUB_RAW") or (
+    "https://raw.githubusercontent.com" if GITHUB_API.rstrip("/") == PUBLIC_GITHUB_API else None
+)
+
+ORG_FILE = "github_orgs.json"
+# Opt-in: refresh github_orgs.json once it is older than this many seconds (0 = never refresh,
+# so a hand-curated org list is never widened behind the user's back)
+ORG_FILE_TTL = int(os.getenv("GITHUB_ORGS_TTL", "0"))
+
+HEADERS = {
+    "Authorization": f"Bearer {GITHUB_TOKEN}",
+    "Accept": "application/vnd.github+json"
+}
+
+# Reuse one keep-alive session (and its connection pool) for every request
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=Retry(total=0)))
+
+# Track rate limit state from the headers of real responses
+class RateLimiter:
+    """Track the API rate limit from response headers instead of polling /rate_limit."""
+
+    def __init__(self):
+        self.remaining = None  # Unknown until the first response arrives
+        self.reset = 0
+        self.lock = threading.Lock()
+
+    def update(self, response):
+        """Record the X-RateLimit-* headers returned with a response."""
+        with self.lock:
+            if "X-RateLimit-Remaining" in response.headers:
+                self.remaining = int(response.headers["X-RateLimit-Remaining"])
+                self.reset = int(response.headers.get("X-RateLimit-Reset", self.reset))
+
+    def maybe_sleep(self):
+        """Sleep until the reset time if the last response exhausted the budget."""
+        with self.lock:
+            if self.remaining != 0:
+                return
+            reset = self.reset
+            sleep_time = max(reset - int(time.time()), 65)
+
+        # Sleep without the lock so other workers can keep recording responses
+        print(f"⏳ Rate limit exceeded. Sleeping for {sleep_time} seconds...")
+        time.sleep(sleep_time)
+
+        with self.lock:
+            # Forget the exhausted budget unless a newer response already replaced it
+            if self.remaining == 0 and self.reset == reset:
+                self.remaining = None
+
+# Fetch rate limit status
+def check_rate_limit():
+    """Check GitHub API rate limits before making requests (for display only)."""
+    url = f"{GITHUB_API}/rate_limit"
+    response = SESSION.get(url)
+
+    if response.status_code == 200:
+        data = response.json()
+        remaining = data["rate"]["remaining"]
+        reset_time = int(data["rate"]["reset"])
+        print(f"\U0001F6A6 API Rate Limit: {remaining} requests remaining. Resets at {reset_time}.")
+        return remaining, reset_time
+    else:
+        print(f"⚠️ Could not retrieve rate limit: {response.status_code} - {response.text}")
+        return 0, 0
+
+# Code search is metered separately from the core API
+search_limiter = RateLimiter()
+
+_search_lock = threading.Lock()
+_search_requests = 0
+
+# Back off after ~9 search requests, shared by all worker threads
+def throttle_search():
+    """Sleep for 65 seconds once 9 search requests have been made."""
+    global _search_requests
+    with _search_lock:
+        if _search_requests >= 9:
+            print("⏳ Reached 9 requests, backing off for 65 seconds...")
+            time.sleep(65)
+            _search_requests = 0
+        _search_requests += 1
+
+# Search a batch of orgs (joined with OR) for the given query
+def search_org_batch(org_query, search_term, headers=None, description=None):
+    """Search GitHub code search for a term in one batch of orgs and return the matching items.
+
+    headers are sent with each request (e.g. a text-match Accept header); description
+    names what is being searched for in the progress message (defaults to the term).
+    """
+    url = f"{GITHUB_API}/search/code"
+    params = {"q": f"{org_query} {search_term}", "per_page": 100}
+
+    description = description or f"'{search_term}'"
+    print(f"🔍 Searching for {description} in {org_query}...")
+    items = []
+    retries = 0
+    max_retries = 5
+
+    while url and retries < max_retries:
+        search_limiter.maybe_sleep()
+        throttle_search()
+        response = SESSION.get(url, params=params, headers=headers)
+        search_limiter.update(response)
+
+        if response.status_code == 200:
+            items.extend(response.json().get("items", []))
+            # Follow the Link header to the next page; its URL already carries the query
+            url = response.links.get("next", {}).get("url")
+            params = None
+            retries = 0
+
+        elif response.status_code == 403:
+            retries += 1
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                # Budget exhausted: maybe_sleep() at the top of the loop waits for the reset
+                continue
+            sleep_time = 65 * (2 ** retries)
+            print(f"⚠️ Rate limit hit. Retrying in {sleep_time} seconds...")
+            time.sleep(sleep_time)
+        else:
+            print(f"❌ API Error: {response.status_code} - {response.text}")
+            break
+    return items
+
+# Fetch all organizations from GitHub and save them to github_orgs.json
+def fetch_github_orgs():
+    """Fetch all organizations associated with the authenticated user."""
+    url = f"{GITHUB_API}/user/orgs"
+    params = {"per_page": 100}
+    orgs = []
+
+    while url:
+        response = SESSION.get(url, params=params)
+        if response.status_code != 200:
+            print(f"❌ Error fetching orgs: {response.status_code} - {response.text}")
+            return []
+        orgs.extend(org["login"] for org in response.json())
+        # Follow the Link header; its URL already carries the paging params
+        url = response.links.get("next", {}).get("url")
+        params = None
+
+    with open(ORG_FILE, "w") as f:
+        json.dump(orgs, f, indent=4)
+    print(f"✅ Organizations saved to {ORG_FILE}")
+    return orgs
+
+# Load the list of GitHub organizations, at most once per process
+@lru_cache(maxsize=1)
+def load_orgs(ttl=ORG_FILE_TTL):
+    """Load GitHub organizations from file, refreshing them from GitHub when missing or stale."""
+    if not os.path.exists(ORG_FILE):
+        print("⚠️ Org file missing. Fetching from GitHub...")
+        return fetch_github_orgs()
+
+    if ttl and time.time() - os.path.getmtime(ORG_FILE) >= ttl:
+        print(f"⚠️ Org file older than {ttl} seconds. Refreshing from GitHub...")
+        orgs = fetch_github_orgs()
+        if orgs:
+            return orgs
+        print(f"⚠️ Refresh failed. Falling back to {ORG_FILE}.")
+
+    try:
+        with open(ORG_FILE, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"❌ Error loading {ORG_FILE}: {e}")
+        return fetch_github_orgs()
+
+# GitHub's search API rejects queries with more than five AND/OR/NOT operators
+MAX_ORGS_PER_QUERY = 6
+
+# Split search queries to stay within GitHub's 256-character limit
+def split_search_queries(orgs, search_term, max_length=200, max_orgs=None):
+    """Split org search queries into multiple searches under the character limit (and at most max_orgs orgs each)."""
+    search_queries = []
+    current_query = []
+    current_length = len(search_term) + 1  # Including space
+
+    for org in orgs:
+        org_part = f"org:{org}"
+        added_length = len(org_part) + (4 if current_query else 0)  # Including " OR "
+        if current_query and (current_length + added_length > max_length
+                              or (max_orgs and len(current_query) >= max_orgs)):
+            search_queries.append(" OR ".join(current_query))
+            current_query = []
+            current_length = len(search_term) + 1
+            added_length = len(org_part)
+        current_query.append(org_part)
+        current_length += added_length
+
+    if current_query:
+        search_queries.append(" OR ".join(current_query))
+
+    return search_queries
@@ -1,85 +1,36 @@
 #!/usr/bin/env python3
 
-import os
 import sys
-import json
-import time
-import requests
+import orjson
+from urllib.parse import quote
 import yaml
-from dotenv import load_dotenv
+from collections import Counter
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from github_common import GITHUB_API, GITHUB_RAW, GITHUB_TOKEN, SESSION, RateLimiter, check_rate_limit, load_orgs
 
-# ------------------
-# Environment Setup
-# ------------------
-load_dotenv()
-GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-GITHUB_API = os.getenv("GITHUB_ENTERPRISE", "https://api.github.com")
+try:
+    # libyaml's C loader is several times faster than the pure-Python one
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
 
-HEADERS = {
-    "Authorization": f"Bearer {GITHUB_TOKEN}",
-    "Accept": "application/vnd.github+json"
-}
+RESULTS_FILE = "third_party_actions_inventory.jsonl"
+WORKFLOWS_DIR = ".github/workflows/"
 
-ORG_FILE = "github_orgs.json"
-RESULTS_FILE = "third_party_actions_inventory.json"
+# Lower-cased org logins treated as first-party; set once in main()
+OWN_ORGS = frozenset()
+# Number of orgs / repos / workflow files fetched concurrently
+MAX_WORKERS = 8
+# Number of third-party action publishers listed in the summary
+TOP_PUBLISHERS = 10
 
 
 # ------------------
 # Helper Functions
 # ------------------
 
-def check_rate_limit():
-    """Check GitHub API rate limit status before making requests."""
-    url = f"{GITHUB_API}/rate_limit"
-    response = requests.get(url, headers=HEADERS)
-    if response.status_code == 200:
-        data = response.json()
-        remaining = data["rate"]["remaining"]
-        reset_time = data["rate"]["reset"]
-        print(f"Rate Limit: {remaining} remaining; resets at {reset_time}.")
-        return remaining, reset_time
-    else:
-        print(f"⚠️ Could not retrieve rate limit: {response.status_code} - {response.text}")
-        return 0, 0
-
-
-def enforce_rate_limit():
-    """Check rate limit, if exhausted, sleep until reset."""
-    remaining, reset_time = check_rate_limit()
-    if remaining == 0:
-        # Sleep 65s or until the reset time (whichever is longer)
-        sleep_time = max(reset_time - int(time.time()), 65)
-        print(f"⏳ Rate limit exceeded. Sleeping for {sleep_time} seconds...")
-        time.sleep(sleep_time)
-
-
-def fetch_orgs():
-    """Fetch all organizations for the authenticated user if missing."""
-    url = f"{GITHUB_API}/user/orgs"
-    response = requests.get(url, headers=HEADERS)
-    if response.status_code == 200:
-        orgs = [org["login"] for org in response.json()]
-        with open(ORG_FILE, "w") as f:
-            json.dump(orgs, f, indent=4)
-        print(f"✅ Organizations saved to {ORG_FILE}")
-        return orgs
-    else:
-        print(f"❌ Error fetching orgs: {response.status_code} - {response.text}")
-        return []
-
-
-def load_orgs():
-    """Load GitHub organizations from file or fetch them if missing."""
-    if not os.path.exists(ORG_FILE):
-        print("⚠️ Org file missing. Fetching from GitHub...")
-        return fetch_orgs()
-
-    try:
-        with open(ORG_FILE, "r") as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"❌ Error loading {ORG_FILE}: {e}")
-        return fetch_orgs()
+rate_limiter = RateLimiter()
 
 
 def fetch_all_repos(org):
@@ -92,14 +43,15 @@ def fetch_all_repos(org):
     page = 1
 
     while True:
-        enforce_rate_limit()
+        rate_limiter.maybe_sleep()
         url = f"{GITHUB_API}/orgs/{org}/repos"
         params = {
             "type": "all",
             "per_page": 100,
             "page": page
         }
-        response = requests.get(url, headers=HEADERS, params=params)
+        response = SESSION.get(url, params=params)
+        rate_limiter.update(response)
 
         if response.status_code != 200:
             print(f"❌ Error fetching repos for {org}: {response.status_code} - {response.text}")
@@ -115,18 +67,63 @@ def fetch_all_repos(org):
     return repos
 
 
-def fetch_workflow_files(org, repo_name):
+def fetch_workflow_files(org, repo_name, default_branch):
     """
     List all files in the `.github/workflows` directory of a given repo.
-    Returns a list of file paths (with the API download URLs).
+    Uses a single recursive Git Trees API call and filters the paths locally.
+    Returns a list of file paths (with raw download URLs).
     """
     print(f"    📂 Checking workflows in {org}/{repo_name}")
+    if not GITHUB_RAW:
+        # No raw host for this API (GitHub Enterprise without GITHUB_RAW); use server-provided download URLs
+        return fetch_workflow_dir(org, repo_name)
+
     files = []
-    enforce_rate_limit()
+    rate_limiter.maybe_sleep()
+
+    url = f"{GITHUB_API}/repos/{org}/{repo_name}/git/trees/{quote(default_branch)}"
+    response = SESSION.get(url, params={"recursive": 1})
+    rate_limiter.update(response)
+
+    # 404 = missing branch/repo, 409 = empty repository; either way there are no workflows
+    if response.status_code in (404, 409):
+        return files
+    if response.status_code != 200:
+        print(f"    ❌ Error fetching workflows for {org}/{repo_name}: {response.status_code} - {response.text}")
+        return files
+
+    tree = response.json()
+    if tree.get("truncated"):
+        # Very large repos don't fit in one tree response; list the directory directly instead
+        return fetch_workflow_dir(org, repo_name)
+
+    for entry in tree.get("tree", []):
+        path = entry["path"]
+        if entry["type"] != "blob" or not path.startswith(WORKFLOWS_DIR):
+            continue
+        name = path[len(WORKFLOWS_DIR):]
+        # GitHub only runs workflow files sitting directly in .github/workflows
+        if "/" not in name:
+            files.append({
+                "name": name,
+                "path": path,
+                "download_url": f"{GITHUB_RAW}/{org}/{repo_name}/{quote(default_branch)}/{quote(path)}"
+            })
+    return files
+
+
+def fetch_workflow_dir(org, repo_name):
+    """
+    List the `.github/workflows` directory through the Git Contents API.
+    Fallback for repos whose recursive tree is truncated.
+    """
+    files = []
+    rate_limiter.maybe_sleep()
 
     # The `.github/workflows` path in the repo tree can be accessed via the Git Contents API
     url = f"{GITHUB_API}/repos/{org}/{repo_name}/contents/.github/workflows"
-    response = requests.get(url, headers=HEADERS)
+    response = SESSION.get(url)
+    rate_limiter.update(response)
 
     # If there's no workflows directory or the repo is empty, we skip
     if response.status_code == 404:
@@ -152,15 +149,21 @@ def parse_workflow_file(download_url):
     """
     Download and parse a workflow file from a given URL. Returns a list of 'uses' references found.
     """
-    enforce_rate_limit()
-    response = requests.get(download_url, headers=HEADERS)
+    rate_limiter.maybe_sleep()
+    response = SESSION.get(download_url)
+    rate_limiter.update(response)
     if response.status_code != 200:
-        # If we cannot fetch it, skip
+        # If we cannot fetch it, say so and skip
+        print(f"      ⚠️ Could not download {download_url}: {response.status_code}")
+        return []
+
+    content = response.text
+    # Cheap substring check to skip files that cannot contain any step references
+    if "uses:" not in content and "jobs:" not in content:
         return []
 
     try:
-        content = response.text
-        workflow_data = yaml.safe_load(content)
+        workflow_data = yaml.load(content, Loader=YamlLoader)
     except Exception as e:
         print(f"      ⚠️ Could not parse YAML: {e}")
         return []
@@ -188,17 +191,19 @@ def parse_workflow_file(download_url):
     return uses_references
 
 
-def is_third_party(action_ref, own_orgs):
+@lru_cache(maxsize=4096)
+def is_third_party(action_ref):
     """
     Heuristic to determine if an action reference is third-party.
     We consider something third-party if:
       - It's not a built-in like 'actions/checkout' or 'actions/setup-node'.
-      - It's not referencing your own organizations if you want to exclude them.
+      - It's not referencing your own organizations (OWN_ORGS) if you want to exclude them.
       - It typically has the form: <owner>/<repo>@<version>
     This logic can be customized further.
+    The same references recur across most repos, so results are memoized.
     """
     # Example: actions/checkout@v2 -> not third-party
-    #          myorg/some-custom-action@v1 -> possibly first-party if myorg is in own_orgs
+    #          myorg/some-custom-action@v1 -> possibly first-party if myorg is in OWN_ORGS
     #          random-user/random-action@v3 -> third-party
 
     # Normalize
@@ -214,10 +219,33 @@ def is_third_party(action_ref, own_orgs):
         return False  # We can't parse it, default to not labeling it third-party.
 
     owner = parts[0]
-    return owner not in own_orgs and owner != "docker"  # Some folks do 'docker://...' references.
+    return owner not in OWN_ORGS and owner != "docker"  # Some folks do 'docker://...' references.
+
+
+def iter_inventory(path=RESULTS_FILE):
+    """
+    Yield the per-repo records of the JSONL results file one at a time.
+    Each line holds one repo: {"org": ..., "repo": ..., "entries": [...]}.
+    """
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
+
+
+def load_inventory(path=RESULTS_FILE):
+    """
+    Rebuild the nested {org: {repo: [entries]}} inventory from the JSONL results file.
+    Holds the whole inventory in memory; use iter_inventory() to stream it instead.
+    """
+    results = {}
+    for record in iter_inventory(path):
+        results.setdefault(record["org"], {})[record["repo"]] = record["entries"]
+    return results
 
 
 def main():
+    global OWN_ORGS
     if not GITHUB_TOKEN:
         print("❌ GITHUB_TOKEN not set. Please define it in your .env or environment.")
         sys.exit(1)
@@ -226,75 +254,82 @@ def main():
     if not orgs:
         print("❌ No organizations found. Exiting.")
         sys.exit(1)
+    check_rate_limit()
 
     # So we can mark them as first-party if used from these orgs:
     # (In many shops, you only label your official GitHub org or GitHub user as first-party.)
-    my_orgs_lower = [o.lower() for o in orgs]
-
-    # Results data structure:
-    # {
-    #   "org_name": {
-    #       "repo_name": [
-    #           {
-    #             "workflow_file": "some-workflow.yml",
-    #             "uses_reference": "repo/action@v2",
-    #             "is_third_party": True/False
-    #           },
-    #           ...
-    #       ]
-    #   },
-    #   ...
-    # }
-    results = {}
-
-    for org in orgs:
-        repos = fetch_all_repos(org)
-        if not repos:
-            print(f"❌ No repositories found in org {org} or error occurred.")
-            continue
-
-        org_results = {}
-        for repo in repos:
-            repo_name = repo["name"]
-            workflow_files = fetch_workflow_files(org, repo_name)
-
-            if not workflow_files:
+    OWN_ORGS = frozenset(o.lower() for o in orgs)
+    is_third_party.cache_clear()
+
+    # Results are streamed to disk one repo per line (JSONL), so memory stays bounded
+    # by a single repo and a crash mid-scan keeps everything written so far:
+    # {"org": "org_name", "repo": "repo_name", "entries": [
+    #     {
+    #       "workflow_file": "some-workflow.yml",
+    #       "uses_reference": "repo/action@v2",
+    #       "is_third_party": True/False
+    #     },
+    #     ...
+    # ]}
+
+    # Repo listings, workflow lookups and workflow downloads are network-bound,
+    # so overlap them across thread pools. Downloads get their own pool so they
+    # don't queue behind the remaining repo lookups.
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor, \
+            ThreadPoolExecutor(max_workers=MAX_WORKERS) as download_executor, \
+            open(RESULTS_FILE, "wb") as results_file:
+        for org, repos in zip(orgs, executor.map(fetch_all_repos, orgs)):
+            if not repos:
+                print(f"❌ No repositories found in org {org} or error occurred.")
                 continue
 
-            repo_inventory = []
-            for wf in workflow_files:
-                uses_list = parse_workflow_file(wf["download_url"])
-                for action_ref in uses_list:
-                    data_entry = {
-                        "workflow_file": wf["path"],
-                        "uses_reference": action_ref,
-                        "is_third_party": is_third_party(action_ref, my_orgs_lower)
-                    }
-                    repo_inventory.append(data_entry)
-
-            if repo_inventory:
-                org_results[repo_name] = repo_inventory
-
-        if org_results:
-            results[org] = org_results
-
-    # Save to JSON
-    with open(RESULTS_FILE, "w") as f:
-        json.dump(results, f, indent=4)
+            repo_workflows = executor.map(
+                lambda repo: fetch_workflow_files(org, repo["name"], repo.get("default_branch") or "HEAD"),
+                repos
+            )
+            for repo, workflow_files in zip(repos, repo_workflows):
+                repo_name = repo["name"]
+
+                if not workflow_files:
+                    continue
+
+                repo_inventory = []
+                uses_lists = download_executor.map(lambda wf: parse_workflow_file(wf["download_url"]), workflow_files)
+                for wf, uses_list in zip(workflow_files, uses_lists):
+                    for action_ref in uses_list:
+                        data_entry = {
+                            "workflow_file": wf["path"],
+                            "uses_reference": action_ref,
+                            "is_third_party": is_third_party(action_ref)
+                        }
+                        repo_inventory.append(data_entry)
+
+                if repo_inventory:
+                    record = {"org": org, "repo": repo_name, "entries": repo_inventory}
+                    results_file.write(orjson.dumps(record) + b"\n")
+                    results_file.flush()
 
     print(f"\n✅ Inventory complete. Results saved to {RESULTS_FILE}")
 
-    # Optional: Print a brief summary of third-party actions
+    # Optional: Print a brief summary of third-party actions, streaming the
+    # results file one repo at a time rather than loading the whole inventory
     print("\n=== Third-Party Actions Found ===")
     third_party_count = 0
-    for org, repos_data in results.items():
-        for repo_name, entries in repos_data.items():
-            for e in entries:
-                if e["is_third_party"]:
-                    print(f"{org}/{repo_name}: {e['uses_reference']} (file: {e['workflow_file']})")
-                    third_party_count += 1
+    publisher_counts = Counter()  # Who publishes the third-party actions we depend on most
+    for record in iter_inventory():
+        for e in record["entries"]:
+            if not e["is_third_party"]:
+                continue
+            print(f"{record['org']}/{record['repo']}: {e['uses_reference']} (file: {e['workflow_file']})")
+            third_party_count += 1
+            publisher_counts[e["uses_reference"].split("@")[0].split("/")[0].lower()] += 1
     print(f"Total third-party references found: {third_party_count}")
 
+    if publisher_counts:
+        print(f"\n=== Top {TOP_PUBLISHERS} Third-Party Publishers ===")
+        for owner, count in publisher_counts.most_common(TOP_PUBLISHERS):
+            print(f"{owner}: {count} reference(s)")
+
 
 if __name__ == "__main__":
     main()
@@ -1,171 +1,258 @@
+import argparse
+import re
 import time
 import json
 import sys
 import datetime
-from tabulate import tabulate
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 
 def format_expiry(expiry):
     """Convert Unix timestamp to human-readable date, or return 'Session'."""
-    if expiry == "Session" or expiry is None:
+    # DevTools reports session cookies with expires == -1
+    if expiry == "Session" or expiry is None or expiry < 0:
         return "Session Cookie"
     try:
         return datetime.datetime.fromtimestamp(expiry, datetime.UTC).strftime('%Y-%m-%d %H:%M:%S')
     except (ValueError, OSError):
         return "Invalid Expiry"
 
+# Cookie-name prefixes for each purpose, checked in order (first match wins)
+COOKIE_PREFIXES = [
+    ("Analytics (Google Analytics)", ("_ga", "_gid", "_gat", "__utma", "__utmb", "__utmz")),
+    ("Analytics (Hotjar)", ("_hjid", "_hjSessionUser", "_hjFirstSeen", "_hjAbsoluteSessionInProgress")),
+    ("Marketing (Facebook)", ("_fbp", "_fbc", "fr")),
+    ("Session Management", ("PHPSESSID", "JSESSIONID", "ASPSESSIONID", "ASP.NET_SessionId", "SESS")),
+    ("Security (CSRF Protection)", ("csrftoken", "_csrf", "XSRF-TOKEN")),
+    ("Load Balancing", ("AWSALB", "AWSALBCORS")),
+    ("Security/CDN (Imperva)", ("incap_ses_", "visid_incap_", "nlbi_")),
+    ("Security/CDN (Cloudflare)", ("cf_", "__cf", "cloudflare")),
+    ("Security/CDN (Bot Detection)", ("ak_bmsc", "bm_sz", "_abck")),
+    ("Authentication", ("auth_", "token", "jwt", "remember_", "login_", "user_", "session_", "id_token", "access_token")),
+]
+
+# One alternation with a named group per purpose, so a single match() classifies a cookie
+CLASSIFIER = re.compile("|".join(
+    f"(?P<p{i}>{'|'.join(map(re.escape, prefixes))})"
+    for i, (_, prefixes) in enumerate(COOKIE_PREFIXES)
+))
+LABELS = {f"p{i}": label for i, (label, _) in enumerate(COOKIE_PREFIXES)}
+
 def identify_cookie_type(name):
     """Identify likely purpose of a cookie based on its name."""
-    if name.startswith(("_ga", "_gid", "_gat", "__utma", "__utmb", "__utmz")):
-        return "Analytics (Google Analytics)"
-    elif name.startswith(("_hjid", "_hjSessionUser", "_hjFirstSeen", "_hjAbsoluteSessionInProgress")):
-        return "Analytics (Hotjar)"
-    elif name.startswith(("_fbp", "_fbc", "fr")):
-        return "Marketing (Facebook)"
-    elif name.startswith(("PHPSESSID", "JSESSIONID", "ASPSESSIONID", "ASP.NET_SessionId", "SESS")):
-        return "Session Management"
-    elif name.startswith(("csrftoken", "_csrf", "XSRF-TOKEN")):
-        return "Security (CSRF Protection)"
-    elif name.startswith(("AWSALB", "AWSALBCORS")):
-        return "Load Balancing"
-    elif name.startswith(("incap_ses_", "visid_incap_", "nlbi_")):
-        return "Security/CDN (Imperva)"
-    elif name.startswith(("cf_", "__cf", "cloudflare")):
-        return "Security/CDN (Cloudflare)"
-    elif name.startswith(("ak_bmsc", "bm_sz", "_abck")):
-        return "Security/CDN (Bot Detection)"
-    elif name.startswith(("auth_", "token", "jwt", "remember_", "login_", "user_", "session_", "id_token", "access_token")):
-        return "Authentication"
-    elif "consent" in name.lower():
+    match = CLASSIFIER.match(name)
+    if match:
+        return LABELS[match.lastgroup]
+    lower_name = name.lower()
+    if "consent" in lower_name:
         return "Cookie Consent"
-    elif "tracking" in name.lower():
+    elif "tracking" in lower_name:
         return "Tracking/Marketing"
     else:
         return "Unknown"
 
-# Check for command-line arguments
-if len(sys.argv) != 2:
-    print("\nUsage: python analyze_cookies.py <URL>")
-    print("Example: python analyze_cookies.py https://www.yourdomain.com")
-    sys.exit(1)
-
-# Get URL from argument
-url = sys.argv[1]
-
-# Setup Selenium with headless Chrome
-options = Options()
-options.add_argument("--headless")  # Run in headless mode
-options.add_argument("--disable-gpu")  # Disable GPU for headless mode stability
-options.add_argument("--no-sandbox")  # Avoid issues in some environments
-options.add_argument("--disable-dev-shm-usage")  # Prevent crashes in Docker
-options.add_argument("--window-size=1920,1080")  # Set standard window size
-options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36")
-
-# Initialize the WebDriver
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=options)
-
-print(f"\n🔍 Analyzing cookies for: {url}")
-
-# Open the website
-driver.get(url)
-
-# Allow JavaScript to execute
-time.sleep(3)
-
-# Extract cookies
-cookies = driver.get_cookies()
-
-# Close the browser
-driver.quit()
-
-# Header
-print("\n" + "=" * 50)
-print("                 COOKIE SECURITY ANALYSIS")
-print("=" * 50 + "\n")
-
-# Security analysis
-secure_count = 0
-httponly_count = 0
-samesite_count = 0
-total_cookies = len(cookies)
-
-cookie_data = []
-table_data = []
-
-for cookie in cookies:
-    name = cookie['name']
-    domain = cookie['domain']
-    path = cookie['path']
-    secure = "✅ Yes" if cookie['secure'] else "❌ No"
-    httponly = "✅ Yes" if cookie.get('httpOnly', False) else "❌ No"
-    expiry = format_expiry(cookie.get('expiry', 'Session'))
-    samesite = cookie.get('sameSite', 'Not Set')
-    likely_purpose = identify_cookie_type(name)
-
-    # Increment security counters
-    if secure == "✅ Yes":
-        secure_count += 1
-    if httponly == "✅ Yes":
-        httponly_count += 1
-    if samesite != "Not Set":
-        samesite_count += 1
-
-    # Print detailed per-cookie security information with emojis
-    print(f"🍪 Cookie: {name}")
-    print(f"  🔹 Domain: {domain}")
-    print(f"  🔹 Path: {path}")
-    print(f"  🔹 Secure: {secure}")
-    print(f"  🔹 HttpOnly: {httponly}")
-    print(f"  🔹 SameSite: {samesite}")
-    print(f"  🔹 Expiry: {expiry}")
-    print(f"  🔹 Likely Purpose: {likely_purpose}\n")
-
-    # Store data for JSON output
-    cookie_data.append({
-        "name": name,
-        "domain": domain,
-        "path": path,
-        "secure": secure,
-        "httponly": httponly,
-        "samesite": samesite,
-        "expiry": expiry,
-        "likely_purpose": likely_purpose
-    })
-
-    # Store data for summary table (without emojis for clean formatting)
-    table_data.append([name, domain, "Yes" if "✅" in secure else "No", 
-                       "Yes" if "✅" in httponly else "No", samesite, expiry])
-
-# Summary Table
-print("=" * 50)
-print("                 COOKIES SUMMARY TABLE")
-print("=" * 50 + "\n")
-
-# Format table
-headers = ["Cookie Name", "Domain", "Secure", "HttpOnly", "SameSite", "Expiry"]
-print(tabulate(table_data, headers=headers, tablefmt="grid"))
-
-# Security Recommendations
-print("\n" + "=" * 50)
-print("                 SECURITY RECOMMENDATIONS")
-print("=" * 50 + "\n")
-
-if secure_count < total_cookies:
-    print("⚠️  Set the Secure flag on all cookies to prevent transmission over HTTP.")
-if httponly_count < total_cookies:
-    print("⚠️  Set the HttpOnly flag to prevent JavaScript access to cookies.")
-if samesite_count < total_cookies:
-    print("⚠️  Set the SameSite attribute (Lax or Strict recommended) to prevent CSRF attacks.")
-
-print("\n✅ Analysis complete.")
-json_filename = "cookies_analysis.json"
-
-# Save to JSON file
-with open(json_filename, "w") as json_file:
-    json.dump(cookie_data, json_file, indent=4)
-
-print(f"📂 Cookie data saved to `{json_filename}`.")
+def get_all_cookies(driver):
+    """Return every cookie in the browser, across all domains, with one DevTools call."""
+    return driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+
+def wait_for_cookies(driver, timeout=10):
+    """Wait for the page to finish loading, then for the cookie count to stop changing."""
+    deadline = time.monotonic() + timeout
+    try:
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    except TimeoutException:
+        print(f"⚠️  Page did not finish loading within {timeout}s; analyzing cookies set so far.")
+        return
+
+    # Scripts often set cookies just after load; wait for two unchanged polls in a row
+    previous, stable = -1, 0
+    while stable < 2 and time.monotonic() < deadline:
+        time.sleep(0.25)
+        current = len(get_all_cookies(driver))
+        stable = stable + 1 if current == previous else 0
+        previous = current
+
+def parse_args():
+    """Collect the URLs to analyze from the command line and/or a URLs file."""
+    parser = argparse.ArgumentParser(
+        description="Analyze the cookies set by one or more websites.",
+        epilog="Example: python scan-cookies.py https://www.yourdomain.com https://shop.yourdomain.com"
+    )
+    parser.add_argument("urls", nargs="*", metavar="URL", help="Website URL(s) to analyze")
+    parser.add_argument("--urls-file", help="File with one URL per line (blank lines and # comments ignored)")
+    args = parser.parse_args()
+
+    urls = list(args.urls)
+    if args.urls_file:
+        with open(args.urls_file, "r") as f:
+            urls.extend(line.strip() for line in f if line.strip() and not line.lstrip().startswith("#"))
+    if not urls:
+        parser.print_usage()
+        sys.exit(1)
+    return urls
+
+def create_driver():
+    """Start one headless Chrome instance to be reused for every URL."""
+    # Setup Selenium with headless Chrome
+    options = Options()
+    options.add_argument("--headless")  # Run in headless mode
+    options.add_argument("--disable-gpu")  # Disable GPU for headless mode stability
+    options.add_argument("--no-sandbox")  # Avoid issues in some environments
+    options.add_argument("--disable-dev-shm-usage")  # Prevent crashes in Docker
+    options.add_argument("--window-size=1920,1080")  # Set standard window size
+    options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/110.0.0.0 Safari/537.36")
+
+    # Initialize the WebDriver
+    service = Service(ChromeDriverManager().install())
+    return webdriver.Chrome(service=service, options=options)
+
+def collect_cookies(driver, url):
+    """Open a website in the shared browser and return the cookies it sets."""
+    print(f"\n🔍 Analyzing cookies for: {url}")
+
+    # Clear the previous site's cookies (every domain) so each analysis starts from an empty jar
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+
+    # Open the website
+    driver.get(url)
+
+    # Allow JavaScript to execute
+    wait_for_cookies(driver)
+
+    # Extract cookies, including those set for third-party domains
+    return get_all_cookies(driver)
+
+def analyze_cookies(cookies, url):
+    """Print the security analysis for one website's cookies and return the JSON records."""
+    # Header
+    print("\n" + "=" * 50)
+    print("                 COOKIE SECURITY ANALYSIS")
+    print("=" * 50 + "\n")
+
+    # Security analysis
+    secure_count = 0
+    httponly_count = 0
+    samesite_count = 0
+    total_cookies = len(cookies)
+
+    cookie_data = []
+    table_data = []
+    report = []
+
+    for cookie in cookies:
+        name = cookie['name']
+        domain = cookie['domain']
+        path = cookie['path']
+        secure = bool(cookie['secure'])
+        httponly = bool(cookie.get('httpOnly', False))
+        expiry = format_expiry(None if cookie.get('session') else cookie.get('expires'))
+        samesite = cookie.get('sameSite', 'Not Set')
+        likely_purpose = identify_cookie_type(name)
+
+        # Increment security counters
+        secure_count += secure
+        httponly_count += httponly
+        if samesite != "Not Set":
+            samesite_count += 1
+
+        # Detailed per-cookie security information with emojis, written out once after the loop
+        report.append(
+            f"🍪 Cookie: {name}\n"
+            f"  🔹 Domain: {domain}\n"
+            f"  🔹 Path: {path}\n"
+            f"  🔹 Secure: {'✅ Yes' if secure else '❌ No'}\n"
+            f"  🔹 HttpOnly: {'✅ Yes' if httponly else '❌ No'}\n"
+            f"  🔹 SameSite: {samesite}\n"
+            f"  🔹 Expiry: {expiry}\n"
+            f"  🔹 Likely Purpose: {likely_purpose}\n\n"
+        )
+
+        # Store data for JSON output
+        cookie_data.append({
+            "name": name,
+            "domain": domain,
+            "path": path,
+            "secure": secure,
+            "httponly": httponly,
+            "samesite": samesite,
+            "expiry": expiry,
+            "likely_purpose": likely_purpose,
+            "url": url
+        })
+
+        # Store data for summary table (without emojis for clean formatting)
+        table_data.append([name, domain, "Yes" if secure else "No",
+                           "Yes" if httponly else "No", samesite, expiry])
+
+    sys.stdout.write("".join(report))
+
+    # Summary Table
+    print("=" * 50)
+    print("                 COOKIES SUMMARY TABLE")
+    print("=" * 50 + "\n")
+
+    # Format table: a grid for terminals, plain TSV when piped or redirected
+    headers = ["Cookie Name", "Domain", "Secure", "HttpOnly", "SameSite", "Expiry"]
+    if sys.stdout.isatty():
+        from tabulate import tabulate
+        print(tabulate(table_data, headers=headers, tablefmt="grid"))
+    else:
+        sys.stdout.write("\t".join(headers) + "\n")
+        sys.stdout.writelines("\t".join(map(str, row)) + "\n" for row in table_data)
+
+    # Security Recommendations
+    print("\n" + "=" * 50)
+    print("                 SECURITY RECOMMENDATIONS")
+    print("=" * 50 + "\n")
+
+    if secure_count < total_cookies:
+        print("⚠️  Set the Secure flag on all cookies to prevent transmission over HTTP.")
+    if httponly_count < total_cookies:
+        print("⚠️  Set the HttpOnly flag to prevent JavaScript access to cookies.")
+    if samesite_count < total_cookies:
+        print("⚠️  Set the SameSite attribute (Lax or Strict recommended) to prevent CSRF attacks.")
+
+    print("\n✅ Analysis complete.")
+    return cookie_data
+
+def main():
+    urls = parse_args()
+
+    # Chrome startup dominates short runs, so one browser serves every URL
+    driver = create_driver()
+    cookie_data = []
+    failed_urls = []
+    try:
+        for url in urls:
+            # One unreachable site (DNS failure, page load timeout, ...) must not lose the others' results
+            try:
+                cookies = collect_cookies(driver, url)
+            except WebDriverException as e:  # TimeoutException is a subclass
+                print(f"❌ Error loading {url}: {e.msg}")
+                failed_urls.append(url)
+                continue
+            cookie_data.extend(analyze_cookies(cookies, url))
+    finally:
+        # Close the browser
+        driver.quit()
+
+    json_filename = "cookies_analysis.json"
+
+    # Save to JSON file
+    with open(json_filename, "w") as json_file:
+        json.dump(cookie_data, json_file, indent=4)
+
+    print(f"📂 Cookie data saved to `{json_filename}`.")
+
+    if failed_urls:
+        print(f"⚠️  Could not analyze {len(failed_urls)} URL(s): {', '.join(failed_urls)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,30 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
 import subprocess
 import sys
-import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
 
 QUALYS_SSL_LABS_URL = "https://www.ssllabs.com/ssltest/analyze.html?d={}"
 
-# Explicit sort order for protocols.
+# Number of domains scanned in parallel (override with --workers).
+DEFAULT_WORKERS = 8
+
+# Kill sslscan if a single scan takes longer than this many seconds.
+SSLSCAN_TIMEOUT = 120
+
+# Raw sslscan reports are cached here, keyed by domain and sslscan version.
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "scan-ssl-tls")
+# Reuse a cached report for this many seconds (override with --ttl).
+CACHE_TTL = 24 * 60 * 60
+
+# Explicit display order for protocols.
 PROTOCOL_ORDER = {
     "TLSv1.3": 0,
     "TLSv1.2": 1,
@@ -13,21 +33,154 @@ PROTOCOL_ORDER = {
     "SSLv3": 4,
     "SSLv2": 5
 }
+# sslscan output is parsed as bytes; these map raw tokens to their str form.
+_PROTOS = {version.encode(): version for version in PROTOCOL_ORDER}
+_PROTO_STATES = {b"enabled": "enabled", b"disabled": "disabled"}
+_CIPHER_ROLES = {b"Preferred": "Preferred", b"Accepted": "Accepted"}
+
+# Report line prefixes.
+_LEGACY_PROTOCOLS = frozenset(("SSLv2", "SSLv3", "TLSv1.0", "TLSv1.1"))
+_GOOD = "   ✅ "
+_BAD = "   ❌ "
+_WEAK_CIPHER = "   ❌ WEAK "
+_STRONG_CIPHER = "   ✅ Accepted "
+
+# Line prefixes that route each sslscan line to its parser.
+_PROTO_PREFIXES = (b"TLSv", b"SSLv")
+_CIPHER_PREFIXES = (b"Preferred ", b"Accepted ")
+
+# Certificate "key: value" lines, mapped to their report names.
+_CERT_KEYS = {
+    b"Subject": "Subject",
+    b"Issuer": "Issuer",
+    b"Not valid before": "Valid From",
+    b"Not valid after": "Valid To",
+    b"RSA Key Strength": "RSA Key Size",
+}
+_CERT_DETAILS = ("Valid From", "Valid To", "RSA Key Size")
+
+def run_sslscan(domain, timeout=SSLSCAN_TIMEOUT):
+    """Runs sslscan and yields its raw output line by line as it is produced."""
+    proc = subprocess.Popen(
+        ["sslscan", "--no-colour", domain],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
 
-def run_sslscan(domain):
-    """Runs sslscan and returns the raw output."""
+    # Watchdog: a black-holed target would otherwise block the read forever.
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    watchdog = threading.Timer(timeout, kill)
+    watchdog.daemon = True
+    watchdog.start()
     try:
-        result = subprocess.run(
-            ["sslscan", "--no-colour", domain],
-            capture_output=True, text=True, check=True
-        )
-        return result.stdout
-    except FileNotFoundError:
-        print("❌ Error: `sslscan` is not installed. Install it and try again.")
-        sys.exit(1)
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error running `sslscan`: {e}")
-        sys.exit(1)
+        with proc:
+            for line in proc.stdout:
+                yield line.rstrip(b"\r\n")
+    finally:
+        watchdog.cancel()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(proc.args, timeout)
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+@lru_cache(maxsize=1)
+def sslscan_version():
+    """Returns the installed sslscan version banner, or an empty string if it cannot be read."""
+    try:
+        result = subprocess.run(["sslscan", "--version"], capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return b""
+    return result.stdout.strip()
+
+def cache_path(domain):
+    """Returns the cache file for a domain's sslscan report under the installed sslscan version."""
+    key = hashlib.sha1(domain.encode() + b"\0" + sslscan_version()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.txt")
+
+def load_cached_report(path, ttl):
+    """Returns a cached raw sslscan report if it is younger than ttl seconds, otherwise None."""
+    try:
+        if time.time() - os.path.getmtime(path) >= ttl:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+def save_cached_report(path, lines):
+    """Atomically writes a raw sslscan report to the cache."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.writelines(line + b"\n" for line in lines)
+        os.replace(tmp_path, path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+def record_lines(lines, sink):
+    """Yields lines unchanged while appending each one to sink."""
+    for line in lines:
+        sink.append(line)
+        yield line
+
+def scan_domain(domain, ttl=CACHE_TTL, use_cache=True):
+    """Runs sslscan on a domain (or reuses a fresh cached report) and parses it; returns None if the scan fails."""
+    path = cache_path(domain)
+    if use_cache:
+        cached = load_cached_report(path, ttl)
+        if cached is not None:
+            print(f"♻️  Using cached `sslscan` results for {domain}", file=sys.stderr)
+            return parse_sslscan_output(cached)
+
+    raw_lines = []
+    try:
+        # Parse while sslscan is still running instead of waiting for all of its output.
+        parsed_data = parse_sslscan_output(record_lines(run_sslscan(domain), raw_lines))
+    except subprocess.TimeoutExpired as e:
+        print(f"❌ `sslscan` timed out on {domain} after {e.timeout} seconds", file=sys.stderr)
+        return None
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"❌ Error running `sslscan` on {domain}: {e}", file=sys.stderr)
+        return None
+
+    # Only cache complete, successful scans.
+    try:
+        save_cached_report(path, raw_lines)
+    except OSError as e:
+        print(f"⚠️  Could not cache `sslscan` results for {domain}: {e}", file=sys.stderr)
+    return parsed_data
+
+def cipher_name_is_weak(cipher_name: str) -> bool:
+    """Returns True unless the cipher uses both ephemeral key exchange and an AEAD mode."""
+    c = cipher_name.upper()
+    # "DHE" also matches ECDHE.
+    ephemeral = "DHE" in c
+    aead = ("GCM" in c) or ("CHACHA" in c) or ("POLY1305" in c)
+    return not (ephemeral and aead)
+
+# TLSv1.2 suites from Mozilla's "Intermediate" server-side TLS configuration.
+MOZILLA_INTERMEDIATE_CIPHERS = (
+    "ECDHE-ECDSA-AES128-GCM-SHA256",
+    "ECDHE-RSA-AES128-GCM-SHA256",
+    "ECDHE-ECDSA-AES256-GCM-SHA384",
+    "ECDHE-RSA-AES256-GCM-SHA384",
+    "ECDHE-ECDSA-CHACHA20-POLY1305",
+    "ECDHE-RSA-CHACHA20-POLY1305",
+    "DHE-RSA-AES128-GCM-SHA256",
+    "DHE-RSA-AES256-GCM-SHA384",
+    "DHE-RSA-CHACHA20-POLY1305",
+)
+
+# Verdicts by cipher name for pre-TLSv1.3 suites, seeded with the common
+# case and filled in as new names are seen.
+_KNOWN_CIPHERS = {name: cipher_name_is_weak(name) for name in MOZILLA_INTERMEDIATE_CIPHERS}
 
 def is_cipher_weak(cipher_name: str, tls_version: str) -> bool:
     """
@@ -37,116 +190,166 @@ def is_cipher_weak(cipher_name: str, tls_version: str) -> bool:
         (ECDHE or DHE) and an AEAD algorithm (GCM, CHACHA, or POLY1305).
       - If both conditions are met, it is strong; otherwise, it's weak.
     """
-    c = cipher_name.upper()
     if tls_version == "TLSv1.3":
         return False
-    ephemeral = ("ECDHE" in c) or ("DHE" in c)
-    aead = any(x in c for x in ["GCM", "CHACHA", "POLY1305"])
-    return not (ephemeral and aead)
+    weak = _KNOWN_CIPHERS.get(cipher_name)
+    if weak is None:
+        weak = _KNOWN_CIPHERS.setdefault(cipher_name, cipher_name_is_weak(cipher_name))
+    return weak
 
 def parse_sslscan_output(output):
-    """Parses sslscan output into a structured format."""
+    """Parses sslscan output (bytes, a string or an iterable of byte lines) into a structured format in a single pass."""
+    if isinstance(output, str):
+        output = output.encode()
+    if isinstance(output, bytes):
+        output = output.splitlines()
+
     parsed_data = {
         "TLS_Protocols": {},
         "Cipher_Suites": [],
         "Certificate": {}
     }
+    protocols = {}
+    cert = {}
+    details = {}
+    # Bind per-line lookups to locals once for the loop below.
+    add_cipher = parsed_data["Cipher_Suites"].append
 
-    # Extract TLS protocols.
-    tls_pattern = re.compile(r"^(TLSv[\d\.]+|SSLv[\d\.]+)\s+(enabled|disabled)$", re.MULTILINE)
-    for version, status in tls_pattern.findall(output):
-        parsed_data["TLS_Protocols"][version] = status
-
-    # Sort protocols using explicit order.
-    parsed_data["TLS_Protocols"] = dict(sorted(
-        parsed_data["TLS_Protocols"].items(),
-        key=lambda item: PROTOCOL_ORDER.get(item[0], 99)
-    ))
-
-    # Extract Cipher Suites.
-    cipher_pattern = re.compile(
-        r"^(Preferred|Accepted)\s+(TLSv[\d\.]+)\s+\d+\s+bits\s+([A-Za-z0-9\-_]+)",
-        re.MULTILINE
-    )
-    for match in cipher_pattern.findall(output):
-        pref_or_acc, version, cipher = match
-        weak = is_cipher_weak(cipher, version)
-        parsed_data["Cipher_Suites"].append({
-            "Version": version,
-            "Cipher": cipher,
-            "PreferredOrAccepted": pref_or_acc,
-            "Weak": weak
-        })
-
-    # Extract Certificate Details.
-    cert_pattern = re.compile(r"^\s*(Subject|Issuer):\s*(.+)$", re.MULTILINE)
-    for match in cert_pattern.findall(output):
-        key, value = match
-        parsed_data["Certificate"][key] = value.strip()
-
-    valid_from_pattern = re.search(r"Not valid before:\s*(.+)", output)
-    valid_to_pattern = re.search(r"Not valid after:\s*(.+)", output)
-    if valid_from_pattern:
-        parsed_data["Certificate"]["Valid From"] = valid_from_pattern.group(1)
-    if valid_to_pattern:
-        parsed_data["Certificate"]["Valid To"] = valid_to_pattern.group(1)
-
-    rsa_pattern = re.search(r"RSA Key Strength:\s*(\d+)", output)
-    if rsa_pattern:
-        parsed_data["Certificate"]["RSA Key Size"] = rsa_pattern.group(1) + " bits"
+    # Dispatch each line on a cheap prefix check, then split it into fields.
+    for line in output:
+        if line.startswith(_PROTO_PREFIXES):
+            # Protocol lines are just "<version> <enabled|disabled>".
+            parts = line.split()
+            if len(parts) == 2 and parts[0] in _PROTOS and parts[1] in _PROTO_STATES:
+                protocols[_PROTOS[parts[0]]] = _PROTO_STATES[parts[1]]
+        elif line.startswith(_CIPHER_PREFIXES):
+            # "<Preferred|Accepted> <version> <n> bits <cipher> [key exchange details]"
+            parts = line.split(None, 5)
+            if (len(parts) >= 5 and parts[3] == b"bits" and parts[2].isdigit()
+                    and parts[1].startswith(_PROTO_PREFIXES)):
+                # Reuse one str object per version, role and cipher name across rows.
+                version = _PROTOS.get(parts[1]) or sys.intern(parts[1].decode("ascii", "replace"))
+                cipher = sys.intern(parts[4].decode("ascii", "replace"))
+                add_cipher({
+                    "Version": version,
+                    "Cipher": cipher,
+                    "PreferredOrAccepted": _CIPHER_ROLES[parts[0]],
+                    "Weak": is_cipher_weak(cipher, version)
+                })
+        elif b":" in line:
+            key, _, value = line.strip().partition(b":")
+            name = _CERT_KEYS.get(key)
+            value = value.strip()
+            if name is None or not value:
+                continue
+            value = value.decode("utf-8", "replace")
+            if name == "Subject" or name == "Issuer":
+                cert[name] = value
+            else:
+                # Keep the first dates and key size, as sslscan prints the leaf certificate first.
+                details.setdefault(name, value)
+
+    # Emit protocols in the explicit order; only known versions are collected.
+    parsed_data["TLS_Protocols"] = {v: protocols[v] for v in PROTOCOL_ORDER if v in protocols}
+
+    # Certificate Details, in display order.
+    parsed_data["Certificate"] = cert
+    for name in _CERT_DETAILS:
+        if name in details:
+            cert[name] = details[name]
+    if "RSA Key Size" in cert:
+        cert["RSA Key Size"] += " bits"
 
     return parsed_data
 
 def display_results(parsed_data, domain):
     """Displays structured results in a readable format."""
-    print("🔍 SSL/TLS Security Report\n")
+    # Build the whole report and write it once, so concurrent scans never interleave with it.
+    out = [f"🔍 SSL/TLS Security Report for {domain}\n"]
 
     # TLS Protocol Support.
-    print("🔹 TLS/SSL Protocol Support:")
+    out.append("🔹 TLS/SSL Protocol Support:")
     for version, status in parsed_data["TLS_Protocols"].items():
         # For older protocols, if disabled then that's good.
-        if version in ["SSLv2", "SSLv3", "TLSv1.0", "TLSv1.1"]:
-            indicator = "✅" if status == "disabled" else "❌"
+        if version in _LEGACY_PROTOCOLS:
+            indicator = _GOOD if status == "disabled" else _BAD
         else:
-            indicator = "✅" if status == "enabled" else "❌"
-        print(f"   {indicator} {version} ({status.capitalize()})")
+            indicator = _GOOD if status == "enabled" else _BAD
+        out.append(f"{indicator}{version} ({status.capitalize()})")
 
     # Cipher Suites.
-    print("\n🔹 Cipher Suites:")
+    out.append("\n🔹 Cipher Suites:")
     for c in parsed_data["Cipher_Suites"]:
-        prefix = c["PreferredOrAccepted"]
-        if c["Weak"]:
-            print(f"   ❌ WEAK {c['Version']} {c['Cipher']} ({prefix})")
-        else:
-            print(f"   ✅ Accepted {c['Version']} {c['Cipher']} ({prefix})")
+        prefix = _WEAK_CIPHER if c["Weak"] else _STRONG_CIPHER
+        out.append(f"{prefix}{c['Version']} {c['Cipher']} ({c['PreferredOrAccepted']})")
 
     # SSL Certificate Details.
-    print("\n🔹 SSL Certificate Details:")
+    out.append("\n🔹 SSL Certificate Details:")
     for key, value in parsed_data["Certificate"].items():
-        print(f"   {key}: {value}")
+        out.append(f"   {key}: {value}")
 
     # Qualys Link.
-    print("\n🔗 For a more detailed scan, visit:")
-    print(f"   {QUALYS_SSL_LABS_URL.format(domain)}\n")
+    out.append("\n🔗 For a more detailed scan, visit:")
+    out.append(f"   {QUALYS_SSL_LABS_URL.format(domain)}\n")
 
     # Mozilla Link.
-    print("\n🔗 For server TLS configuration, visit:")
-    print(f"   https://wiki.mozilla.org/Security/Server_Side_TLS\n")
+    out.append("\n🔗 For server TLS configuration, visit:")
+    out.append("   https://wiki.mozilla.org/Security/Server_Side_TLS\n")
 
-    print("✅ Scan complete.\n")
+    out.append("✅ Scan complete.\n")
+    sys.stdout.write("\n".join(out) + "\n")
+
+def parse_args():
+    """Collect the domains to scan and the cache settings from the command line."""
+    parser = argparse.ArgumentParser(
+        description="Check the SSL/TLS configuration of one or more domains with sslscan.",
+        epilog="Example: python scan-ssl-tls.py www.yourdomain.com shop.yourdomain.com"
+    )
+    parser.add_argument("domains", nargs="+", metavar="DOMAIN", help="Domain(s) to scan")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Ignore cached sslscan results and rescan (fresh results are still cached)")
+    parser.add_argument("--ttl", type=int, default=CACHE_TTL, metavar="SECONDS",
+                        help=f"Reuse cached sslscan results younger than this (default: {CACHE_TTL})")
+    parser.add_argument("--json", action="store_true",
+                        help="Print one compact JSON object per domain instead of the report")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, metavar="N",
+                        help=f"Number of sslscan runs in parallel (default: {DEFAULT_WORKERS})")
+    args = parser.parse_args()
+
+    # Reject bad values before any scan starts.
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.ttl < 0:
+        parser.error("--ttl must not be negative")
+    return args
 
 def main():
-    if len(sys.argv) != 2:
-        print("\nUsage: python scan_ssl_tls.py <DOMAIN>")
-        print("Example: python scan_ssl_tls.py www.yourdomain.com")
+    args = parse_args()
+    domains = args.domains
+
+    if shutil.which("sslscan") is None:
+        print("❌ Error: `sslscan` is not installed. Install it and try again.", file=sys.stderr)
         sys.exit(1)
 
-    domain = sys.argv[1]
-    print(f"\n🔍 Running `sslscan` on {domain}...\n")
+    if not args.json:
+        print(f"\n🔍 Running `sslscan` on {', '.join(domains)}...\n")
+    scan = partial(scan_domain, ttl=args.ttl, use_cache=not args.no_cache)
 
-    raw_output = run_sslscan(domain)
-    parsed_data = parse_sslscan_output(raw_output)
-    display_results(parsed_data, domain)
+    # sslscan is network-bound, so scan every domain concurrently and report in order.
+    failed = False
+    with ThreadPoolExecutor(max_workers=min(args.workers, len(domains))) as executor:
+        for domain, parsed_data in zip(domains, executor.map(scan, domains)):
+            if parsed_data is None:
+                failed = True
+                continue
+            if args.json:
+                # Machine-readable output skips all report formatting.
+                print(json.dumps({"domain": domain, **parsed_data}, separators=(",", ":")))
+            else:
+                display_results(parsed_data, domain)
+
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()